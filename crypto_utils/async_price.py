@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import typing
+from datetime import datetime
+
+import aiohttp
+
+from crypto_utils import enums, exceptions, http_utils
+from crypto_utils.price import (
+    BaseUniswapPriceProvider,
+    BaseUniswapTransactionValueUsdProvider,
+    BinancePriceProvider,
+    CoingeckoPriceProvider,
+    UniswapV2PriceProvider,
+    UniswapV3PriceProvider,
+)
+
+if typing.TYPE_CHECKING:
+    import eth_typing
+    from gql.client import AsyncClientSession
+
+log = logging.getLogger(__name__)
+
+
+class AsyncHttpClient:
+    def __init__(self, connection_limit: int = 20, max_concurrency: int = 10) -> None:
+        self._connection_limit = connection_limit
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: aiohttp.ClientSession | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._connection_limit),
+                timeout=aiohttp.ClientTimeout(sock_connect=3, sock_read=10),
+            )
+        return self._session
+
+    async def request(
+        self, url: str, params: dict[str, typing.Any] | None = None
+    ) -> typing.Any:
+        async with self._semaphore:
+            async with self._get_session().get(url, params=params) as resp:
+                if resp.status == 200:
+                    return http_utils.parse_json(await resp.read())
+                raise exceptions.RequestError(
+                    status_code=resp.status,
+                    retry_after=http_utils.parse_retry_after(
+                        resp.headers.get("Retry-After")
+                    ),
+                )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *exc_info: typing.Any) -> None:
+        await self.close()
+
+
+_ProviderT = typing.TypeVar("_ProviderT", bound="AsyncHttpPriceProvider")
+
+
+class AsyncHttpPriceProvider:
+    # a passed in client is owned by the caller, which can share its pool
+    # between providers, otherwise the provider opens and closes its own
+    def __init__(self, http_client: AsyncHttpClient | None = None) -> None:
+        self._owns_http_client = http_client is None
+        self._http_client = http_client or AsyncHttpClient()
+
+    async def close(self) -> None:
+        if self._owns_http_client:
+            await self._http_client.close()
+
+    async def __aenter__(self: _ProviderT) -> _ProviderT:
+        return self
+
+    async def __aexit__(self, *exc_info: typing.Any) -> None:
+        await self.close()
+
+
+class AsyncCoingeckoPriceProvider(AsyncHttpPriceProvider, CoingeckoPriceProvider):
+    async def _request_price_json_async(
+        self, contract_address: str, url: str
+    ) -> typing.Any:
+        attempt = 0
+        while True:
+            await self._rate_limiter.acquire_async()
+            try:
+                return await self._http_client.request(url)
+            except exceptions.RequestError as request_error:
+                if request_error.status_code != 429 or attempt >= self.MAX_RETRIES:
+                    raise self._get_request_failure(contract_address, request_error)
+                await asyncio.sleep(
+                    self._get_retry_delay(attempt, request_error.retry_after)
+                )
+                attempt += 1
+
+    async def get_price_of_contract_in_usd_async(
+        self,
+        contract_address: eth_typing.ChecksumAddress,
+        at_time: int,
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> float | None:
+        cached_price = self._get_cached_price(contract_address, at_time, blockchain)
+        if cached_price is not None:
+            return cached_price
+        url = self._get_price_url(contract_address, at_time, blockchain)
+        price_response_json = await self._request_price_json_async(
+            contract_address, url
+        )
+        price = self._extract_price(price_response_json, at_time)
+        self._cache_price(contract_address, at_time, blockchain, price)
+        return price
+
+    @typing.overload
+    async def get_price_of_contract_in_usd_many(
+        self,
+        contract_addresses: list[eth_typing.ChecksumAddress],
+        at_times: list[int],
+        blockchain: enums.Blockchain = ...,
+        *,
+        return_exceptions: typing.Literal[False] = ...,
+    ) -> list[float | None]:
+        ...
+
+    @typing.overload
+    async def get_price_of_contract_in_usd_many(
+        self,
+        contract_addresses: list[eth_typing.ChecksumAddress],
+        at_times: list[int],
+        blockchain: enums.Blockchain = ...,
+        *,
+        return_exceptions: typing.Literal[True],
+    ) -> list[float | None | BaseException]:
+        ...
+
+    async def get_price_of_contract_in_usd_many(
+        self,
+        contract_addresses: list[eth_typing.ChecksumAddress],
+        at_times: list[int],
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+        *,
+        return_exceptions: bool = False,
+    ) -> list[float | None] | list[float | None | BaseException]:
+        # raises the first failure unless return_exceptions is set, then every
+        # failed lookup is returned in place of its price
+        return await asyncio.gather(
+            *(
+                self.get_price_of_contract_in_usd_async(
+                    contract_address, at_time, blockchain
+                )
+                for contract_address, at_time in zip(contract_addresses, at_times)
+            ),
+            return_exceptions=return_exceptions,
+        )
+
+    async def get_prices_of_contracts_in_usd_async(
+        self,
+        contract_addresses: list[eth_typing.ChecksumAddress],
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        batches = self._get_address_batches(contract_addresses)
+        price_response_jsons = await asyncio.gather(
+            *(
+                self._request_price_json_async(
+                    ",".join(batch), self._get_simple_price_url(batch, blockchain)
+                )
+                for batch in batches
+            )
+        )
+        prices = {}
+        for batch, price_response_json in zip(batches, price_response_jsons):
+            prices.update(self._extract_simple_prices(price_response_json, batch))
+        return prices
+
+
+class AsyncBinancePriceProvider(AsyncHttpPriceProvider, BinancePriceProvider):
+    async def get_price_of_token_async(self, symbol: str, at_time: datetime) -> float:
+        cache_key = self._get_price_cache_key(symbol, at_time)
+        if cache_key in self._price_cache:
+            return self._price_cache[cache_key]
+        url = f"{self.BINANCE_URL}/klines"
+        params = self._get_klines_params(symbol, at_time)
+        await self._rate_limiter.acquire_async()
+        try:
+            result_json = await self._http_client.request(url, params)
+            close_price = self._extract_close_price(result_json)
+        except Exception as e:
+            raise exceptions.MissingDataError(e)
+        self._price_cache[cache_key] = close_price
+        return close_price
+
+    @typing.overload
+    async def get_price_of_token_many(
+        self,
+        symbols: list[str],
+        at_times: list[datetime],
+        *,
+        return_exceptions: typing.Literal[False] = ...,
+    ) -> list[float]:
+        ...
+
+    @typing.overload
+    async def get_price_of_token_many(
+        self,
+        symbols: list[str],
+        at_times: list[datetime],
+        *,
+        return_exceptions: typing.Literal[True],
+    ) -> list[float | BaseException]:
+        ...
+
+    async def get_price_of_token_many(
+        self,
+        symbols: list[str],
+        at_times: list[datetime],
+        *,
+        return_exceptions: bool = False,
+    ) -> list[float] | list[float | BaseException]:
+        # same as get_price_of_contract_in_usd_many
+        return await asyncio.gather(
+            *(
+                self.get_price_of_token_async(symbol, at_time)
+                for symbol, at_time in zip(symbols, at_times)
+            ),
+            return_exceptions=return_exceptions,
+        )
+
+
+class AsyncUniswapPriceProvider(BaseUniswapPriceProvider):
+    def __init__(self, graph_url: str) -> None:
+        import gql
+        from gql.transport import httpx as httpx_transport
+
+        super().__init__()
+        # http2 lets concurrent queries share one connection to the graph api
+        self._async_transport = httpx_transport.HTTPXAsyncTransport(
+            url=graph_url, http2=True
+        )
+        self._async_client = gql.Client(
+            transport=self._async_transport, fetch_schema_from_transport=False
+        )
+        self._async_session: AsyncClientSession | None = None
+        self._async_session_lock = asyncio.Lock()
+
+    async def _get_async_session(self) -> AsyncClientSession:
+        async with self._async_session_lock:
+            if self._async_session is None:
+                self._async_session = (
+                    await self._async_client.connect_async()  # type: ignore[no-untyped-call]
+                )
+        return self._async_session
+
+    async def _get_price_from_subgraph_async(
+        self, request_variables: dict[str, typing.Any]
+    ) -> float:
+        await self._rate_limiter.acquire_async()
+        session = await self._get_async_session()
+        json_result = await session.execute(
+            self._query, variable_values=request_variables
+        )
+        return self._extract_price(json_result)
+
+    async def get_usd_value_of_transaction_async(
+        self,
+        transaction_hash: eth_typing.ChecksumAddress,
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> float:
+        request_variables = {"transaction_hash": transaction_hash}
+        try:
+            return await self._get_price_from_subgraph_async(request_variables)
+        except Exception as exception:
+            raise exceptions.CantExtractUsdValueError(str(exception)) from exception
+
+    async def _get_prices_from_subgraph_async(
+        self, transaction_hashes: list[eth_typing.ChecksumAddress]
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        hashes_by_id = self._get_hashes_by_id(transaction_hashes)
+        await self._rate_limiter.acquire_async()
+        session = await self._get_async_session()
+        json_result = await session.execute(
+            self._batch_query,
+            variable_values={"transaction_hashes": list(hashes_by_id)},
+        )
+        return self._extract_prices(json_result, hashes_by_id)
+
+    async def get_usd_values_of_transactions_async(
+        self,
+        transaction_hashes: list[eth_typing.ChecksumAddress],
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        try:
+            batch_prices = await asyncio.gather(
+                *(
+                    self._get_prices_from_subgraph_async(batch)
+                    for batch in self._get_transaction_hash_batches(transaction_hashes)
+                )
+            )
+        except Exception as exception:
+            raise exceptions.CantExtractUsdValueError(str(exception)) from exception
+        prices = {}
+        for batch_price in batch_prices:
+            prices.update(batch_price)
+        return prices
+
+    async def close(self) -> None:
+        if self._async_session is not None:
+            await self._async_client.close_async()  # type: ignore[no-untyped-call]
+            self._async_session = None
+
+
+class AsyncUniswapV3PriceProvider(AsyncUniswapPriceProvider):
+    def __init__(self) -> None:
+        super().__init__(graph_url=UniswapV3PriceProvider.UNISWAP_SUBGRAPH_URL)
+
+
+class AsyncUniswapV2PriceProvider(AsyncUniswapPriceProvider):
+    def __init__(self) -> None:
+        super().__init__(graph_url=UniswapV2PriceProvider.UNISWAP_SUBGRAPH_URL)
+
+
+class AsyncUniswapTransactionValueUsdProvider(BaseUniswapTransactionValueUsdProvider):
+    @functools.cached_property
+    def _v3_value_provider(self) -> AsyncUniswapPriceProvider:
+        return AsyncUniswapV3PriceProvider()
+
+    @functools.cached_property
+    def _v2_value_provider(self) -> AsyncUniswapPriceProvider:
+        return AsyncUniswapV2PriceProvider()
+
+    async def get_usd_value_of_transaction_async(
+        self,
+        transaction_hash: eth_typing.ChecksumAddress,
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> float:
+        cached_value = self._get_cached_value(transaction_hash)
+        if cached_value is not None:
+            return cached_value
+        # same as the sync version, v2 is only used once v3 has failed
+        v3_task = asyncio.create_task(
+            self._v3_value_provider.get_usd_value_of_transaction_async(transaction_hash)
+        )
+        v2_task = asyncio.create_task(
+            self._v2_value_provider.get_usd_value_of_transaction_async(transaction_hash)
+        )
+        try:
+            value = await v3_task
+        except exceptions.CantExtractUsdValueError as v3_exception:
+            log.debug(
+                f"Could not get uniswap v3 price for transaction: {transaction_hash}, err: {v3_exception}"
+            )
+            try:
+                value = await v2_task
+            except exceptions.CantExtractUsdValueError as v2_exception:
+                self._cache_missing_value(transaction_hash, v3_exception, v2_exception)
+                raise
+        finally:
+            # an unneeded v2 result is dropped, a finished one has its exception
+            # read so asyncio doesn't log it as never retrieved
+            if not v2_task.cancel() and not v2_task.cancelled():
+                v2_task.exception()
+        return self._cache_value(transaction_hash, value)
+
+    async def get_usd_values_of_transactions_async(
+        self,
+        transaction_hashes: list[eth_typing.ChecksumAddress],
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        uncached_hashes = self._get_uncached_hashes(transaction_hashes)
+        v3_values = None
+        if uncached_hashes:
+            try:
+                v3_values = (
+                    await self._v3_value_provider.get_usd_values_of_transactions_async(
+                        uncached_hashes
+                    )
+                )
+            except exceptions.CantExtractUsdValueError as e:
+                log.debug(f"Could not get uniswap v3 prices for transactions, err: {e}")
+        v2_hashes = self._get_v2_hashes(uncached_hashes, v3_values)
+        v2_values = (
+            await self._v2_value_provider.get_usd_values_of_transactions_async(
+                v2_hashes
+            )
+            if v2_hashes
+            else {}
+        )
+        return self._merge_values(
+            transaction_hashes, uncached_hashes, v3_values, v2_values
+        )
+
+    async def close(self) -> None:
+        # providers are only closed if they were ever created
+        for provider_name in ("_v3_value_provider", "_v2_value_provider"):
+            if provider_name in self.__dict__:
+                await self.__dict__[provider_name].close()
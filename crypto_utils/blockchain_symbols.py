@@ -1,7 +1,11 @@
-import enums
+import types
+
+from crypto_utils import enums, exceptions
+
+BLOCKCHAIN_TOKEN_SYMBOLS = types.MappingProxyType({enums.Blockchain.ETHEREUM: "ETH"})
 
 
 def get_blockchain_token_symbol(blockchain: enums.Blockchain) -> str:
-    match blockchain:
-        case enums.Blockchain.ETHEREUM:
-            return "ETH"
+    if blockchain not in BLOCKCHAIN_TOKEN_SYMBOLS:
+        raise exceptions.UnknownSymbolError(f"Unknown token symbol for {blockchain}")
+    return BLOCKCHAIN_TOKEN_SYMBOLS[blockchain]
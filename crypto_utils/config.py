@@ -5,6 +5,15 @@ class Config:
     COVALENT_KEY = os.getenv("COVALENT_API_KEY")
     W3_PROVIDER = os.getenv("W3_PROVIDER")
     ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+    # outside the package dir, which is read-only on most installs
+    PRICE_CACHE_DIR = os.getenv(
+        "PRICE_CACHE_DIR",
+        os.path.join(
+            os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+            "crypto_utils",
+            "prices",
+        ),
+    )
 
 
 config = Config()
@@ -1,6 +1,7 @@
 class RequestError(Exception):
-    def __init__(self, status_code: int):
+    def __init__(self, status_code: int, retry_after: float | None = None):
         self.status_code = status_code
+        self.retry_after = retry_after
 
 
 class MissingDataError(Exception):
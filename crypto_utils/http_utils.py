@@ -1,16 +1,47 @@
+import types
 import typing
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from crypto_utils import exceptions
 
+try:
+    import orjson as json
+except ImportError:
+    import json  # type: ignore[no-redef]
+
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+)
+_TIMEOUT = (3, 10)  # (connect, read) in seconds
+_DEFAULT_HEADERS = types.MappingProxyType({"Content-Type": "application/json"})
+
+
+def parse_json(content: bytes) -> typing.Any:
+    return json.loads(content)
+
+
+def parse_retry_after(retry_after: str | None) -> float | None:
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:  # HTTP-date form, fall back to our own backoff
+        return None
+
 
 def request(
     url: str,
-    params: dict[str, typing.Any] = {},
-    headers: dict[str, str] = {"H": "Content-Type: application/json"},
+    params: dict[str, typing.Any] | None = None,
+    headers: typing.Mapping[str, str] | None = None,
 ) -> typing.Any:
-    resp = requests.get(url, params=params, headers=headers)
+    headers = headers or _DEFAULT_HEADERS
+    resp = _SESSION.get(url, params=params, headers=headers, timeout=_TIMEOUT)
     if resp.status_code == 200:
-        return resp.json()
-    raise exceptions.RequestError(status_code=resp.status_code)
+        return parse_json(resp.content)
+    raise exceptions.RequestError(
+        status_code=resp.status_code,
+        retry_after=parse_retry_after(resp.headers.get("Retry-After")),
+    )
@@ -1,18 +1,36 @@
+from __future__ import annotations
+
+import concurrent.futures
+import functools
 import logging
+import random
 import time
+import types
 import typing
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 
-import eth_typing
-import gql
-from gql.transport import requests as requests_transport
+import cachetools
+
+from crypto_utils import enums, exceptions, http_utils, rate_limit
+from crypto_utils.config import config
 
-from crypto_utils import enums, exceptions, http_utils
+if typing.TYPE_CHECKING:
+    import diskcache
+    import eth_typing
+    from graphql import DocumentNode
 
 log = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def _parse_query(query: str) -> DocumentNode:
+    # imported on first use so callers that only need cex prices never load gql
+    import gql
+
+    return gql.gql(query)
+
+
 class TransactionValueUsdProvider(ABC):
     @abstractmethod
     def get_usd_value_of_transaction(
@@ -34,9 +52,9 @@ class PriceProvider(ABC):
         pass
 
 
-class UniswapPriceProvider(TransactionValueUsdProvider):
-    QUERY = gql.gql(
-        """
+class BaseUniswapPriceProvider:
+    # queries and parsing shared by the sync and async subgraph providers
+    QUERY = """
         query priceQuery($transaction_hash: String){
 
                       swaps(where: {transaction: $transaction_hash}){
@@ -48,26 +66,89 @@ class UniswapPriceProvider(TransactionValueUsdProvider):
         }
 
         """
-    )
+    BATCH_QUERY = """
+        query batchPriceQuery($transaction_hashes: [String!]){
+
+                      swaps(first: 1000, where: {transaction_in: $transaction_hashes}){
+                        amountUSD
+                        transaction{
+                          id
+                        }
+                      }
+        }
+
+        """
+    BATCH_SIZE = 50
+    # shared by v2 and v3, both subgraphs are served by the same graph api
+    _rate_limiter = rate_limit.RateLimiter(rate=1000, period_s=60)
+
+    def __init__(self) -> None:
+        self._query = _parse_query(self.QUERY)
+        self._batch_query = _parse_query(self.BATCH_QUERY)
 
+    def _extract_price(self, json_result: dict[str, typing.Any]) -> float:
+        if not json_result.get("swaps"):
+            raise exceptions.MissingDataError("No uniswap swap found")
+        swaps = json_result["swaps"]
+        only_swap = swaps[0]
+        price = float(only_swap["amountUSD"])
+        return price
+
+    def _get_hashes_by_id(
+        self, transaction_hashes: list[eth_typing.ChecksumAddress]
+    ) -> dict[str, eth_typing.ChecksumAddress]:
+        # subgraph transaction ids are lowercased
+        return {
+            transaction_hash.lower(): transaction_hash
+            for transaction_hash in transaction_hashes
+        }
+
+    def _extract_prices(
+        self,
+        json_result: dict[str, typing.Any],
+        hashes_by_id: dict[str, eth_typing.ChecksumAddress],
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        if "swaps" not in json_result:
+            raise exceptions.MissingDataError()
+        prices: dict[eth_typing.ChecksumAddress, float] = {}
+        for swap in json_result["swaps"]:
+            transaction_hash = hashes_by_id[swap["transaction"]["id"]]
+            # same as the single query, only the first swap of a transaction counts
+            if transaction_hash not in prices:
+                prices[transaction_hash] = float(swap["amountUSD"])
+        return prices
+
+    def _get_transaction_hash_batches(
+        self, transaction_hashes: list[eth_typing.ChecksumAddress]
+    ) -> list[list[eth_typing.ChecksumAddress]]:
+        return [
+            transaction_hashes[i : i + self.BATCH_SIZE]
+            for i in range(0, len(transaction_hashes), self.BATCH_SIZE)
+        ]
+
+
+class UniswapPriceProvider(BaseUniswapPriceProvider, TransactionValueUsdProvider):
     def __init__(self, graph_url: str) -> None:
+        import gql
+        from gql.transport import requests as requests_transport
+
+        super().__init__()
         self._transport = requests_transport.RequestsHTTPTransport(url=graph_url)
+        # queries are hard-coded, skip the schema introspection round-trip
         self._client = gql.Client(
-            transport=self._transport, fetch_schema_from_transport=True
+            transport=self._transport, fetch_schema_from_transport=False
         )
+        # one session for the provider lifetime keeps the connection alive
+        self._session = self._client.connect_sync()  # type: ignore[no-untyped-call]
 
     def _get_price_from_subgraph(
         self, request_variables: dict[str, typing.Any]
     ) -> float:
-        json_result = self._client.execute(
-            self.QUERY, variable_values=request_variables
+        self._rate_limiter.acquire()
+        json_result = self._session.execute(
+            self._query, variable_values=request_variables
         )
-        if "swaps" not in json_result:
-            raise exceptions.MissingDataError()
-        swaps = json_result["swaps"]
-        only_swap = swaps[0]
-        price = float(only_swap["amountUSD"])
-        return price
+        return self._extract_price(json_result)
 
     def get_usd_value_of_transaction(
         self,
@@ -78,88 +159,463 @@ class UniswapPriceProvider(TransactionValueUsdProvider):
         try:
             return self._get_price_from_subgraph(request_variables)
         except Exception as exception:
-            raise exceptions.CantExtractUsdValueError(str(exception))
+            raise exceptions.CantExtractUsdValueError(str(exception)) from exception
+
+    def _get_prices_from_subgraph(
+        self, transaction_hashes: list[eth_typing.ChecksumAddress]
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        hashes_by_id = self._get_hashes_by_id(transaction_hashes)
+        self._rate_limiter.acquire()
+        json_result = self._session.execute(
+            self._batch_query,
+            variable_values={"transaction_hashes": list(hashes_by_id)},
+        )
+        return self._extract_prices(json_result, hashes_by_id)
+
+    def get_usd_values_of_transactions(
+        self,
+        transaction_hashes: list[eth_typing.ChecksumAddress],
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        # transactions without a swap are omitted from the result
+        prices = {}
+        for batch in self._get_transaction_hash_batches(transaction_hashes):
+            try:
+                prices.update(self._get_prices_from_subgraph(batch))
+            except Exception as exception:
+                raise exceptions.CantExtractUsdValueError(str(exception)) from exception
+        return prices
 
 
 class UniswapV3PriceProvider(UniswapPriceProvider):
     UNISWAP_SUBGRAPH_URL = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v3"
 
-    def __init__(self):
+    def __init__(self) -> None:
         super().__init__(graph_url=UniswapV3PriceProvider.UNISWAP_SUBGRAPH_URL)
 
 
 class UniswapV2PriceProvider(UniswapPriceProvider):
     UNISWAP_SUBGRAPH_URL = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v2"
 
-    def __init__(self):
+    def __init__(self) -> None:
         super().__init__(graph_url=UniswapV2PriceProvider.UNISWAP_SUBGRAPH_URL)
 
 
-class UniswapTransactionValueUsdProvider(TransactionValueUsdProvider):
-    def __init__(self):
-        self._v3_value_provider = UniswapV3PriceProvider()
-        self._v2_value_provider = UniswapV2PriceProvider()
+class BaseUniswapTransactionValueUsdProvider:
+    # caches shared by the sync and async v3/v2 composites
+    VALUE_CACHE_TTL_S = 600
+    _value_cache: cachetools.TTLCache[
+        eth_typing.ChecksumAddress, float
+    ] = cachetools.TTLCache(maxsize=10000, ttl=VALUE_CACHE_TTL_S)
+    # transactions that are not uniswap swaps, maps hash to the error message
+    _missing_value_cache: cachetools.TTLCache[
+        eth_typing.ChecksumAddress, str
+    ] = cachetools.TTLCache(maxsize=10000, ttl=VALUE_CACHE_TTL_S)
+
+    def _get_cached_value(
+        self, transaction_hash: eth_typing.ChecksumAddress
+    ) -> float | None:
+        if transaction_hash in self._missing_value_cache:
+            raise exceptions.CantExtractUsdValueError(
+                self._missing_value_cache[transaction_hash]
+            )
+        return self._value_cache.get(transaction_hash)
+
+    def _is_missing_swap(self, exception: BaseException | None) -> bool:
+        # only a subgraph answer without swaps is a miss, request errors are not
+        if not isinstance(exception, exceptions.CantExtractUsdValueError):
+            return False
+        return isinstance(exception.__cause__, exceptions.MissingDataError)
+
+    def _cache_missing_value(
+        self,
+        transaction_hash: eth_typing.ChecksumAddress,
+        v3_exception: BaseException | None,
+        v2_exception: BaseException | None,
+    ) -> None:
+        if self._is_missing_swap(v3_exception) and self._is_missing_swap(v2_exception):
+            self._missing_value_cache[transaction_hash] = str(v2_exception)
+
+    def _get_uncached_hashes(
+        self, transaction_hashes: list[eth_typing.ChecksumAddress]
+    ) -> list[eth_typing.ChecksumAddress]:
+        return [
+            transaction_hash
+            for transaction_hash in transaction_hashes
+            if transaction_hash not in self._value_cache
+            and transaction_hash not in self._missing_value_cache
+        ]
+
+    def _get_cached_values(
+        self, transaction_hashes: list[eth_typing.ChecksumAddress]
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        return {
+            transaction_hash: self._value_cache[transaction_hash]
+            for transaction_hash in transaction_hashes
+            if transaction_hash in self._value_cache
+        }
+
+    def _cache_value(
+        self, transaction_hash: eth_typing.ChecksumAddress, value: float
+    ) -> float:
+        self._value_cache[transaction_hash] = value
+        return value
+
+    def _get_v2_hashes(
+        self,
+        uncached_hashes: list[eth_typing.ChecksumAddress],
+        v3_values: dict[eth_typing.ChecksumAddress, float] | None,
+    ) -> list[eth_typing.ChecksumAddress]:
+        # v2 only gets what v3 had no swap for, or everything if v3 failed
+        return [
+            transaction_hash
+            for transaction_hash in uncached_hashes
+            if v3_values is None or transaction_hash not in v3_values
+        ]
+
+    def _merge_values(
+        self,
+        transaction_hashes: list[eth_typing.ChecksumAddress],
+        uncached_hashes: list[eth_typing.ChecksumAddress],
+        v3_values: dict[eth_typing.ChecksumAddress, float] | None,
+        v2_values: dict[eth_typing.ChecksumAddress, float],
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        values = {**v2_values, **(v3_values or {})}
+        for transaction_hash in uncached_hashes:
+            if transaction_hash in values:
+                self._cache_value(transaction_hash, values[transaction_hash])
+            # a failed v3 batch says nothing about the hashes v2 didn't have
+            elif v3_values is not None:
+                self._missing_value_cache[transaction_hash] = "No uniswap swap found"
+        values.update(self._get_cached_values(transaction_hashes))
+        return values
+
+
+class UniswapTransactionValueUsdProvider(
+    BaseUniswapTransactionValueUsdProvider, TransactionValueUsdProvider
+):
+    _executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+    @functools.cached_property
+    def _v3_value_provider(self) -> UniswapPriceProvider:
+        return UniswapV3PriceProvider()
+
+    @functools.cached_property
+    def _v2_value_provider(self) -> UniswapPriceProvider:
+        return UniswapV2PriceProvider()
 
     def get_usd_value_of_transaction(
         self,
         transaction_hash: eth_typing.ChecksumAddress,
         blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
     ) -> float:
+        cached_value = self._get_cached_value(transaction_hash)
+        if cached_value is not None:
+            return cached_value
+        # both subgraphs are queried at once so a v3 miss doesn't add a second
+        # round-trip, but v2 is only used once v3 has failed
+        v3_future = self._executor.submit(
+            self._v3_value_provider.get_usd_value_of_transaction, transaction_hash
+        )
+        v2_future = self._executor.submit(
+            self._v2_value_provider.get_usd_value_of_transaction, transaction_hash
+        )
         try:
-            return self._v3_value_provider.get_usd_value_of_transaction(
-                transaction_hash
-            )
-        except exceptions.CantExtractUsdValueError as e:
+            value = v3_future.result()
+        except exceptions.CantExtractUsdValueError as v3_exception:
             log.debug(
-                f"Could not get uniswap v3 price for transaction: {transaction_hash}, err: {e}"
+                f"Could not get uniswap v3 price for transaction: {transaction_hash}, err: {v3_exception}"
             )
-        return self._v2_value_provider.get_usd_value_of_transaction(transaction_hash)
+            try:
+                value = v2_future.result()
+            except exceptions.CantExtractUsdValueError as v2_exception:
+                self._cache_missing_value(transaction_hash, v3_exception, v2_exception)
+                raise
+        finally:
+            v2_future.cancel()
+        return self._cache_value(transaction_hash, value)
+
+    def get_usd_values_of_transactions(
+        self,
+        transaction_hashes: list[eth_typing.ChecksumAddress],
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        uncached_hashes = self._get_uncached_hashes(transaction_hashes)
+        v3_values = None
+        if uncached_hashes:
+            try:
+                v3_values = self._v3_value_provider.get_usd_values_of_transactions(
+                    uncached_hashes
+                )
+            except exceptions.CantExtractUsdValueError as e:
+                log.debug(f"Could not get uniswap v3 prices for transactions, err: {e}")
+        v2_hashes = self._get_v2_hashes(uncached_hashes, v3_values)
+        v2_values = (
+            self._v2_value_provider.get_usd_values_of_transactions(v2_hashes)
+            if v2_hashes
+            else {}
+        )
+        return self._merge_values(
+            transaction_hashes, uncached_hashes, v3_values, v2_values
+        )
 
 
 class CoingeckoPriceProvider(PriceProvider):
     COINGECKO_URL = "https://api.coingecko.com/api/v3"
+    COINGECKO_BLOCKCHAIN_IDS = types.MappingProxyType(
+        {enums.Blockchain.ETHEREUM: "ethereum"}
+    )
+    PRICE_CACHE_TTL_S = 300
+    _price_cache: cachetools.TTLCache[
+        tuple[enums.Blockchain, str, int], float
+    ] = cachetools.TTLCache(maxsize=4096, ttl=PRICE_CACHE_TTL_S)
+    MAX_RETRIES = 5
+    BACKOFF_BASE_S = 1.0
+    BACKOFF_CAP_S = 30.0
+    SIMPLE_PRICE_BATCH_SIZE = 100
+    # free tier allows ~30 req/min, burst + rate stays under that in any minute
+    _rate_limiter = rate_limit.RateLimiter(rate=25, period_s=60, burst=5)
+    DISK_CACHE_BUCKET_S = 3600
+    HISTORICAL_PRICE_AGE_S = 86400
+    PRICE_RANGE_S = 86400
+    MAX_PRICE_TIME_DIFF_S = 3600
+    _disk_cache: diskcache.Cache | None = None
+    _is_disk_cache_disabled = False
+
+    @staticmethod
+    def _disable_disk_cache(exception: Exception) -> None:
+        # an unusable cache dir only costs the http request, so warn once and
+        # keep going without it
+        log.warning(
+            f"Disabling coingecko disk cache at {config.PRICE_CACHE_DIR}, err: {exception}"
+        )
+        CoingeckoPriceProvider._disk_cache = None
+        CoingeckoPriceProvider._is_disk_cache_disabled = True
+
+    @staticmethod
+    def _get_disk_cache() -> diskcache.Cache | None:
+        # opened lazily so importing the module doesn't touch the filesystem
+        if (
+            CoingeckoPriceProvider._disk_cache is None
+            and not CoingeckoPriceProvider._is_disk_cache_disabled
+        ):
+            import diskcache
 
-    def _request_price_json(self, contract_address, url) -> typing.Any:
+            try:
+                CoingeckoPriceProvider._disk_cache = diskcache.Cache(
+                    config.PRICE_CACHE_DIR
+                )
+            except Exception as e:
+                CoingeckoPriceProvider._disable_disk_cache(e)
+        return CoingeckoPriceProvider._disk_cache
+
+    def _get_disk_cached_price(self, disk_cache_key: str) -> float | None:
+        disk_cache = self._get_disk_cache()
+        if disk_cache is None:
+            return None
+        try:
+            price: float | None = disk_cache.get(disk_cache_key)
+        except Exception as e:
+            self._disable_disk_cache(e)
+            return None
+        return price
+
+    def _set_disk_cached_price(
+        self, disk_cache_key: str, price: float, expire: int | None
+    ) -> None:
+        disk_cache = self._get_disk_cache()
+        if disk_cache is None:
+            return
+        try:
+            disk_cache.set(disk_cache_key, price, expire=expire)
+        except Exception as e:
+            self._disable_disk_cache(e)
+
+    def _get_retry_delay(self, attempt: int, retry_after: float | None) -> float:
+        # a zero or missing Retry-After falls back to backoff, servers can't
+        # hold a worker for longer than the cap
+        if retry_after:
+            return min(retry_after, self.BACKOFF_CAP_S)
+        backoff = min(self.BACKOFF_CAP_S, self.BACKOFF_BASE_S * 2.0**attempt)
+        return backoff + random.uniform(0, 0.5)
+
+    def _get_request_failure(
+        self, contract_address: str, request_error: exceptions.RequestError
+    ) -> exceptions.CantFindTokenPriceError:
+        return exceptions.CantFindTokenPriceError(
+            f"Can't find price for token address {contract_address}, req_code {request_error.status_code}"
+        )
+
+    def _request_price_json(self, contract_address: str, url: str) -> typing.Any:
+        attempt = 0
         while True:
+            self._rate_limiter.acquire()
             try:
                 return http_utils.request(url)
             except exceptions.RequestError as request_error:
-                if request_error.status_code == 429:
-                    time.sleep(3)
-                    continue
-                raise exceptions.CantFindTokenPriceError(
-                    f"Can't find price for token address {contract_address}, req_code {request_error.status_code}"
-                )
+                if request_error.status_code != 429 or attempt >= self.MAX_RETRIES:
+                    raise self._get_request_failure(contract_address, request_error)
+                time.sleep(self._get_retry_delay(attempt, request_error.retry_after))
+                attempt += 1
 
     def _get_blockchain_id(self, blockchain: enums.Blockchain) -> str:
-        match blockchain:
-            case blockchain.ETHEREUM:
-                return "ethereum"
+        if blockchain not in self.COINGECKO_BLOCKCHAIN_IDS:
+            raise exceptions.UnknownSymbolError(
+                f"Unknown coingecko id for {blockchain}"
+            )
+        return self.COINGECKO_BLOCKCHAIN_IDS[blockchain]
 
-    def get_price_of_contract_in_usd(
+    def _get_price_url(
         self,
         contract_address: eth_typing.ChecksumAddress,
         at_time: int,
-        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
-    ) -> float | None:
+        blockchain: enums.Blockchain,
+    ) -> str:
         blockchain_id = self._get_blockchain_id(blockchain)
-        at_time_datetime = datetime.fromtimestamp(at_time)
-        start_datetime = at_time_datetime - timedelta(days=1)
-        start_timestamp = int(start_datetime.timestamp())
-        url = (
+        start_timestamp = int(at_time) - self.PRICE_RANGE_S
+        return (
             f"{self.COINGECKO_URL}/coins/{blockchain_id}/contract/{contract_address}/market_chart/range?vs_currency=usd"
             f"&from={start_timestamp}&to={int(at_time)}"
         )
-        price_response_json = self._request_price_json(contract_address, url)
+
+    def _get_price_cache_key(
+        self,
+        contract_address: eth_typing.ChecksumAddress,
+        at_time: int,
+        blockchain: enums.Blockchain,
+    ) -> tuple[enums.Blockchain, str, int]:
+        return (
+            blockchain,
+            contract_address.lower(),
+            int(at_time) // self.PRICE_CACHE_TTL_S,
+        )
+
+    def _get_disk_cache_key(
+        self,
+        contract_address: eth_typing.ChecksumAddress,
+        at_time: int,
+        blockchain: enums.Blockchain,
+    ) -> str:
+        blockchain_id = self._get_blockchain_id(blockchain)
+        hour_bucket = int(at_time) // self.DISK_CACHE_BUCKET_S
+        return f"cg:{blockchain_id}:{contract_address.lower()}:{hour_bucket}"
+
+    def _get_cached_price(
+        self,
+        contract_address: eth_typing.ChecksumAddress,
+        at_time: int,
+        blockchain: enums.Blockchain,
+    ) -> float | None:
+        cache_key = self._get_price_cache_key(contract_address, at_time, blockchain)
+        if cache_key in self._price_cache:
+            return self._price_cache[cache_key]
+        disk_cache_key = self._get_disk_cache_key(contract_address, at_time, blockchain)
+        price = self._get_disk_cached_price(disk_cache_key)
+        if price is not None:
+            self._price_cache[cache_key] = price
+        return price
+
+    def _cache_price(
+        self,
+        contract_address: eth_typing.ChecksumAddress,
+        at_time: int,
+        blockchain: enums.Blockchain,
+        price: float,
+    ) -> None:
+        cache_key = self._get_price_cache_key(contract_address, at_time, blockchain)
+        self._price_cache[cache_key] = price
+        # historical prices never change, recent ones can still be revised
+        price_age = time.time() - at_time
+        expire = (
+            None if price_age > self.HISTORICAL_PRICE_AGE_S else self.PRICE_CACHE_TTL_S
+        )
+        disk_cache_key = self._get_disk_cache_key(contract_address, at_time, blockchain)
+        self._set_disk_cached_price(disk_cache_key, price, expire)
+
+    def _extract_price(self, price_response_json: typing.Any, at_time: int) -> float:
         prices = price_response_json["prices"]
         if not prices:
             raise exceptions.MissingDataError()
         last_price_array = prices[-1]
-        price_time = last_price_array[0] / 1000.0  # ts is in ms
-        time_diff = datetime.fromtimestamp(price_time) - datetime.fromtimestamp(at_time)
-        if time_diff > timedelta(hours=1):
-            print(f"Coingecko price time delta is {time_diff}")
-        return last_price_array[1]  # price at 1st index
+        price_time_s = last_price_array[0] / 1000.0  # ts is in ms
+        # the range ends at at_time, so the last price is at or before it
+        time_diff_s = abs(at_time - price_time_s)
+        if time_diff_s > self.MAX_PRICE_TIME_DIFF_S:
+            log.warning(
+                f"Coingecko price time delta is {timedelta(seconds=time_diff_s)}"
+            )
+        return float(last_price_array[1])  # price at 1st index
+
+    def get_price_of_contract_in_usd(
+        self,
+        contract_address: eth_typing.ChecksumAddress,
+        at_time: int,
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> float | None:
+        cached_price = self._get_cached_price(contract_address, at_time, blockchain)
+        if cached_price is not None:
+            return cached_price
+        url = self._get_price_url(contract_address, at_time, blockchain)
+        price_response_json = self._request_price_json(contract_address, url)
+        price = self._extract_price(price_response_json, at_time)
+        self._cache_price(contract_address, at_time, blockchain, price)
+        return price
+
+    def _get_simple_price_url(
+        self,
+        contract_addresses: list[eth_typing.ChecksumAddress],
+        blockchain: enums.Blockchain,
+    ) -> str:
+        blockchain_id = self._get_blockchain_id(blockchain)
+        return (
+            f"{self.COINGECKO_URL}/simple/token_price/{blockchain_id}"
+            f"?contract_addresses={','.join(contract_addresses)}&vs_currencies=usd"
+        )
+
+    def _extract_simple_prices(
+        self,
+        price_response_json: typing.Any,
+        contract_addresses: list[eth_typing.ChecksumAddress],
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        prices = {}
+        for contract_address in contract_addresses:
+            # coingecko returns lowercased addresses as keys
+            token_prices = price_response_json.get(contract_address.lower(), {})
+            if "usd" in token_prices:
+                prices[contract_address] = float(token_prices["usd"])
+        return prices
+
+    def _get_address_batches(
+        self, contract_addresses: list[eth_typing.ChecksumAddress]
+    ) -> list[list[eth_typing.ChecksumAddress]]:
+        batch_size = self.SIMPLE_PRICE_BATCH_SIZE
+        return [
+            contract_addresses[i : i + batch_size]
+            for i in range(0, len(contract_addresses), batch_size)
+        ]
+
+    def get_prices_of_contracts_in_usd(
+        self,
+        contract_addresses: list[eth_typing.ChecksumAddress],
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        # current prices only, addresses coingecko doesn't know are omitted
+        prices = {}
+        for batch in self._get_address_batches(contract_addresses):
+            url = self._get_simple_price_url(batch, blockchain)
+            price_response_json = self._request_price_json(",".join(batch), url)
+            prices.update(self._extract_simple_prices(price_response_json, batch))
+        return prices
+
+    def get_current_price_of_contract_in_usd(
+        self,
+        contract_address: eth_typing.ChecksumAddress,
+        blockchain: enums.Blockchain = enums.Blockchain.ETHEREUM,
+    ) -> float:
+        prices = self.get_prices_of_contracts_in_usd([contract_address], blockchain)
+        if contract_address not in prices:
+            raise exceptions.MissingDataError()
+        return prices[contract_address]
 
 
 class CexPriceProvider(ABC):
@@ -170,24 +626,46 @@ class CexPriceProvider(ABC):
 
 class BinancePriceProvider(CexPriceProvider):
     BINANCE_URL = "https://data.binance.com/api/v3"
+    _rate_limiter = rate_limit.RateLimiter(rate=1200, period_s=60)
+    PRICE_CACHE_TTL_S = 60
+    _price_cache: cachetools.TTLCache[tuple[str, int], float] = cachetools.TTLCache(
+        maxsize=4096, ttl=PRICE_CACHE_TTL_S
+    )
 
-    def get_price_of_token(self, symbol: str, at_time: datetime) -> float:
+    def _get_price_cache_key(self, symbol: str, at_time: datetime) -> tuple[str, int]:
+        return symbol.upper(), int(at_time.timestamp()) // self.PRICE_CACHE_TTL_S
+
+    def _get_klines_params(
+        self, symbol: str, at_time: datetime
+    ) -> dict[str, typing.Any]:
         start_time = int(at_time.timestamp() * 1000)
         end_time_plus_min = at_time + timedelta(minutes=1)
         end_time = int(end_time_plus_min.timestamp() * 1000)
-        url = f"{self.BINANCE_URL}/klines"
         symbol_with_usdt = f"{symbol.upper()}USDT"
-        params = {
+        return {
             "symbol": symbol_with_usdt,
             "interval": "1m",
             "startTime": start_time,
             "endTime": end_time,
             "limit": 1,
         }
+
+    def _extract_close_price(self, result_json: typing.Any) -> float:
+        single_candle_info = result_json[0]
+        close_price = float(single_candle_info[4])
+        return close_price
+
+    def get_price_of_token(self, symbol: str, at_time: datetime) -> float:
+        cache_key = self._get_price_cache_key(symbol, at_time)
+        if cache_key in self._price_cache:
+            return self._price_cache[cache_key]
+        url = f"{self.BINANCE_URL}/klines"
+        params = self._get_klines_params(symbol, at_time)
+        self._rate_limiter.acquire()
         try:
             result_json = http_utils.request(url, params)
-            single_candle_info = result_json[0]
-            close_price = float(single_candle_info[4])
-            return close_price
+            close_price = self._extract_close_price(result_json)
         except Exception as e:
             raise exceptions.MissingDataError(e)
+        self._price_cache[cache_key] = close_price
+        return close_price
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    # token bucket, every acquire takes one token and waits if the bucket is empty
+    def __init__(self, rate: int, period_s: float, burst: int | None = None) -> None:
+        self._capacity = float(burst if burst is not None else rate)
+        self._refill_per_s = rate / period_s
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        # returns how long the caller has to wait for its token
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated_at
+            self._tokens = min(
+                self._capacity, self._tokens + elapsed * self._refill_per_s
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._refill_per_s
+
+    def acquire(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -1,8 +1,11 @@
+from __future__ import annotations
+
 import typing
 from dataclasses import dataclass
 from datetime import datetime
 
-import eth_typing
+if typing.TYPE_CHECKING:
+    import eth_typing
 
 
 @dataclass
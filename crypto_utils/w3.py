@@ -1,47 +1,171 @@
+from __future__ import annotations
+
+import functools
+import logging
 import os
 import typing
 
-import eth_typing
-from web3 import HTTPProvider, Web3
-
-from crypto_utils import schema
+from crypto_utils import exceptions, schema
 from crypto_utils.config import config
 
-w3_client = Web3(HTTPProvider(config.W3_PROVIDER))
+if typing.TYPE_CHECKING:
+    import eth_typing
+    from web3 import Web3
+
+log = logging.getLogger(__name__)
+
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"  # checksummed
+MULTICALL_BATCH_SIZE = 250
+
+
+@functools.lru_cache(maxsize=None)
+def get_w3_client() -> Web3:
+    # web3 is imported on first use, it is slow to import
+    from web3 import HTTPProvider, Web3
+
+    return Web3(HTTPProvider(config.W3_PROVIDER))
+
 
+def __getattr__(name: str) -> typing.Any:
+    # keeps the module level w3_client working without creating it on import
+    if name == "w3_client":
+        return get_w3_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
+
+# function selectors of the standard interfaces, skips building a contract per call
+SYMBOL_SELECTOR = bytes.fromhex("95d89b41")  # symbol()
+DECIMALS_SELECTOR = bytes.fromhex("313ce567")  # decimals()
+TOKEN0_SELECTOR = bytes.fromhex("0dfe1681")  # token0()
+TOKEN1_SELECTOR = bytes.fromhex("d21220a7")  # token1()
+
+
+@functools.lru_cache(maxsize=None)
 def _load_abi(abi_file_name: str) -> str:
     with open(os.path.join(config.ROOT_DIR, "abis", abi_file_name), "r") as pool_file:
         return [line for line in pool_file][0]
 
 
-def _load_erc20_abi() -> str:
-    return _load_abi("erc20.txt")
+def _load_multicall3_abi() -> str:
+    return _load_abi("multicall3.txt")
 
 
-def get_erc20_info(address: eth_typing.ChecksumAddress) -> schema.ERC20:
-    erc20_abi = _load_erc20_abi()
-    erc20_contract = w3_client.eth.contract(address=address, abi=erc20_abi)
-    symbol = erc20_contract.functions.symbol().call()
-    decimals = erc20_contract.functions.decimals().call()
+@functools.lru_cache(maxsize=None)
+def _get_multicall_contract() -> typing.Any:
+    return get_w3_client().eth.contract(
+        address=typing.cast("eth_typing.ChecksumAddress", MULTICALL3_ADDRESS),
+        abi=_load_multicall3_abi(),
+    )
+
+
+def _aggregate3(
+    calls: list[tuple[eth_typing.ChecksumAddress, bytes]],
+) -> list[tuple[bool, bytes]]:
+    # failing sub-calls don't revert the whole batch, their success flag is False
+    multicall_calls = [(address, True, call_data) for address, call_data in calls]
+    results = _get_multicall_contract().functions.aggregate3(multicall_calls).call()
+    return typing.cast(list[tuple[bool, bytes]], results)
+
+
+def _decode_uint(data: bytes) -> int | None:
+    if len(data) < 32:
+        return None
+    return int.from_bytes(data[:32], "big")
+
+
+def _decode_string(data: bytes) -> str | None:
+    # abi encoded string: offset word, length word at the offset, then the bytes
+    offset = _decode_uint(data)
+    if offset is None:
+        return None
+    length = _decode_uint(data[offset : offset + 32])
+    if length is None:
+        return None
+    encoded = data[offset + 32 : offset + 32 + length]
+    if len(encoded) != length:
+        return None
+    try:
+        return encoded.decode()
+    except UnicodeDecodeError:
+        return None
+
+
+def _decode_address(data: bytes) -> eth_typing.ChecksumAddress | None:
+    if len(data) < 32:
+        return None
+    from web3 import Web3
+
+    # not a cast, which mypy flags as redundant where web3 is typed
+    address: eth_typing.ChecksumAddress = Web3.toChecksumAddress(
+        "0x" + data[12:32].hex()
+    )
+    return address
+
+
+def _decode_erc20_info(
+    address: eth_typing.ChecksumAddress,
+    symbol_result: tuple[bool, bytes],
+    decimals_result: tuple[bool, bytes],
+) -> schema.ERC20 | None:
+    symbol_success, symbol_data = symbol_result
+    decimals_success, decimals_data = decimals_result
+    if not (symbol_success and decimals_success):
+        return None
+    symbol = _decode_string(symbol_data)
+    decimals = _decode_uint(decimals_data)
+    if symbol is None or decimals is None:
+        return None
     return schema.ERC20(symbol=symbol, decimals=decimals, address=address)
 
 
-def _load_pool_abi() -> str:
-    return _load_abi("uni_v3_pool.txt")
+def get_erc20_infos(
+    addresses: list[eth_typing.ChecksumAddress],
+) -> dict[eth_typing.ChecksumAddress, schema.ERC20]:
+    # symbol() and decimals() of every address are fetched in one multicall
+    erc20_infos = {}
+    for i in range(0, len(addresses), MULTICALL_BATCH_SIZE):
+        batch = addresses[i : i + MULTICALL_BATCH_SIZE]
+        calls = []
+        for address in batch:
+            calls.append((address, SYMBOL_SELECTOR))
+            calls.append((address, DECIMALS_SELECTOR))
+        results = _aggregate3(calls)
+        for address, symbol_result, decimals_result in zip(
+            batch, results[::2], results[1::2]
+        ):
+            erc20_info = _decode_erc20_info(address, symbol_result, decimals_result)
+            if erc20_info is None:
+                log.debug(f"Could not get erc20 info for address: {address}")
+                continue
+            erc20_infos[address] = erc20_info
+    return erc20_infos
+
+
+def get_erc20_info(address: eth_typing.ChecksumAddress) -> schema.ERC20:
+    erc20_infos = get_erc20_infos([address])
+    if address not in erc20_infos:
+        raise exceptions.MissingDataError(f"Address {address} is not an erc20 token")
+    return erc20_infos[address]
 
 
 def get_uni3_pool_token_addresses(
     pool_address: eth_typing.ChecksumAddress,
-) -> typing.Union[eth_typing.ChecksumAddress, eth_typing.ChecksumAddress]:
-    pool_abi_text = _load_pool_abi()
-    pool_contract = w3_client.eth.contract(address=pool_address, abi=pool_abi_text)
-    token0 = pool_contract.functions.token0().call()
-    token1 = pool_contract.functions.token1().call()
+) -> tuple[eth_typing.ChecksumAddress, eth_typing.ChecksumAddress]:
+    (token0_success, token0_data), (token1_success, token1_data) = _aggregate3(
+        [(pool_address, TOKEN0_SELECTOR), (pool_address, TOKEN1_SELECTOR)]
+    )
+    token0 = _decode_address(token0_data) if token0_success else None
+    token1 = _decode_address(token1_data) if token1_success else None
+    if token0 is None or token1 is None:
+        raise exceptions.MissingDataError(
+            f"Address {pool_address} is not a uniswap v3 pool"
+        )
     return token0, token1
 
 
 if __name__ == "__main__":
+    from web3 import Web3
+
     print(
         get_erc20_info(
             Web3.toChecksumAddress("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2")
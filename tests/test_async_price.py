@@ -0,0 +1,151 @@
+import asyncio
+
+import cachetools
+import eth_typing
+import pytest
+
+from crypto_utils import async_price, exceptions, price
+
+
+def _hash(value: str) -> eth_typing.ChecksumAddress:
+    return eth_typing.ChecksumAddress(eth_typing.HexAddress(eth_typing.HexStr(value)))
+
+
+def _missing_swap() -> exceptions.CantExtractUsdValueError:
+    exception = exceptions.CantExtractUsdValueError("No uniswap swap found")
+    exception.__cause__ = exceptions.MissingDataError("No uniswap swap found")
+    return exception
+
+
+class FakeAsyncUniswapProvider:
+    def __init__(
+        self,
+        values: dict[eth_typing.ChecksumAddress, float] | None = None,
+        exception: Exception | None = None,
+        delay_s: float = 0.0,
+    ) -> None:
+        self.values = values or {}
+        self.exception = exception
+        self.delay_s = delay_s
+        self.calls: list[list[eth_typing.ChecksumAddress]] = []
+
+    async def get_usd_value_of_transaction_async(
+        self, transaction_hash: eth_typing.ChecksumAddress
+    ) -> float:
+        self.calls.append([transaction_hash])
+        await asyncio.sleep(self.delay_s)
+        if self.exception is not None:
+            raise self.exception
+        return self.values[transaction_hash]
+
+    async def get_usd_values_of_transactions_async(
+        self, transaction_hashes: list[eth_typing.ChecksumAddress]
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        self.calls.append(transaction_hashes)
+        if self.exception is not None:
+            raise self.exception
+        return {
+            transaction_hash: self.values[transaction_hash]
+            for transaction_hash in transaction_hashes
+            if transaction_hash in self.values
+        }
+
+
+@pytest.fixture
+def uniswap(
+    monkeypatch: pytest.MonkeyPatch,
+) -> async_price.AsyncUniswapTransactionValueUsdProvider:
+    base = price.BaseUniswapTransactionValueUsdProvider
+    monkeypatch.setattr(base, "_value_cache", cachetools.TTLCache(16, ttl=600))
+    monkeypatch.setattr(base, "_missing_value_cache", cachetools.TTLCache(16, ttl=600))
+    return async_price.AsyncUniswapTransactionValueUsdProvider()
+
+
+def _set_uniswap_providers(
+    provider: async_price.AsyncUniswapTransactionValueUsdProvider,
+    v3_provider: FakeAsyncUniswapProvider,
+    v2_provider: FakeAsyncUniswapProvider,
+) -> None:
+    # cached_property reads the instance dict first
+    provider.__dict__["_v3_value_provider"] = v3_provider
+    provider.__dict__["_v2_value_provider"] = v2_provider
+
+
+def test_uniswap_prefers_v3_when_v2_answers_first(
+    uniswap: async_price.AsyncUniswapTransactionValueUsdProvider,
+) -> None:
+    transaction_hash = _hash("0xa")
+    v3_provider = FakeAsyncUniswapProvider({transaction_hash: 1.0}, delay_s=0.2)
+    v2_provider = FakeAsyncUniswapProvider({transaction_hash: 2.0})
+    _set_uniswap_providers(uniswap, v3_provider, v2_provider)
+
+    value = asyncio.run(uniswap.get_usd_value_of_transaction_async(transaction_hash))
+
+    assert value == 1.0
+
+
+def test_uniswap_caches_miss_when_both_subgraphs_have_no_swap(
+    uniswap: async_price.AsyncUniswapTransactionValueUsdProvider,
+) -> None:
+    transaction_hash = _hash("0xa")
+    v3_provider = FakeAsyncUniswapProvider(exception=_missing_swap())
+    v2_provider = FakeAsyncUniswapProvider(exception=_missing_swap())
+    _set_uniswap_providers(uniswap, v3_provider, v2_provider)
+
+    for _ in range(2):
+        with pytest.raises(exceptions.CantExtractUsdValueError):
+            asyncio.run(uniswap.get_usd_value_of_transaction_async(transaction_hash))
+
+    assert (len(v3_provider.calls), len(v2_provider.calls)) == (1, 1)
+
+
+def test_uniswap_batch_fills_v3_gaps_from_v2(
+    uniswap: async_price.AsyncUniswapTransactionValueUsdProvider,
+) -> None:
+    v3_hash, v2_hash, missing_hash = _hash("0xa"), _hash("0xb"), _hash("0xc")
+    v3_provider = FakeAsyncUniswapProvider({v3_hash: 1.0})
+    v2_provider = FakeAsyncUniswapProvider({v2_hash: 2.0})
+    _set_uniswap_providers(uniswap, v3_provider, v2_provider)
+
+    values = asyncio.run(
+        uniswap.get_usd_values_of_transactions_async([v3_hash, v2_hash, missing_hash])
+    )
+
+    assert values == {v3_hash: 1.0, v2_hash: 2.0}
+    assert v2_provider.calls == [[v2_hash, missing_hash]]
+    assert missing_hash in uniswap._missing_value_cache
+
+
+class RecordingHttpClient(async_price.AsyncHttpClient):
+    def __init__(self) -> None:
+        super().__init__()
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+        await super().close()
+
+
+def test_provider_does_not_close_a_passed_in_client() -> None:
+    http_client = RecordingHttpClient()
+
+    async def use_providers() -> None:
+        async with async_price.AsyncBinancePriceProvider(http_client):
+            pass
+        await async_price.AsyncCoingeckoPriceProvider(http_client).close()
+
+    asyncio.run(use_providers())
+
+    assert not http_client.closed
+
+
+def test_provider_closes_its_own_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(async_price, "AsyncHttpClient", RecordingHttpClient)
+
+    async def use_provider() -> RecordingHttpClient:
+        async with async_price.AsyncBinancePriceProvider() as provider:
+            http_client = provider._http_client
+        assert isinstance(http_client, RecordingHttpClient)
+        return http_client
+
+    assert asyncio.run(use_provider()).closed
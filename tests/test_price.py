@@ -0,0 +1,226 @@
+import logging
+import pathlib
+import sqlite3
+import time
+import typing
+
+import cachetools
+import eth_typing
+import pytest
+
+from crypto_utils import exceptions, http_utils, price, rate_limit
+from crypto_utils.config import config
+
+WETH = eth_typing.ChecksumAddress(
+    eth_typing.HexAddress(
+        eth_typing.HexStr("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2")
+    )
+)
+AT_TIME = 1600000000
+TRANSACTION_HASH = eth_typing.ChecksumAddress(
+    eth_typing.HexAddress(eth_typing.HexStr("0xa"))
+)
+
+
+class FailingDiskCache:
+    def get(self, key: str) -> typing.Any:
+        raise sqlite3.OperationalError("disk I/O error")
+
+    def set(self, key: str, value: typing.Any, expire: int | None = None) -> None:
+        raise sqlite3.OperationalError("disk I/O error")
+
+
+@pytest.fixture(autouse=True)
+def coingecko(monkeypatch: pytest.MonkeyPatch) -> None:
+    provider = price.CoingeckoPriceProvider
+    monkeypatch.setattr(provider, "_price_cache", cachetools.TTLCache(16, ttl=300))
+    monkeypatch.setattr(provider, "_disk_cache", None)
+    monkeypatch.setattr(provider, "_is_disk_cache_disabled", False)
+    monkeypatch.setattr(
+        provider, "_rate_limiter", rate_limit.RateLimiter(rate=100, period_s=1)
+    )
+    monkeypatch.setattr(
+        http_utils,
+        "request",
+        lambda url: {"prices": [[AT_TIME * 1000, 1500.0]]},
+    )
+
+
+def test_unwritable_disk_cache_is_a_miss(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: pathlib.Path,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    not_a_dir = tmp_path / "price_cache"
+    not_a_dir.write_text("")
+    monkeypatch.setattr(config, "PRICE_CACHE_DIR", str(not_a_dir))
+    provider = price.CoingeckoPriceProvider()
+
+    with caplog.at_level(logging.WARNING):
+        assert provider.get_price_of_contract_in_usd(WETH, AT_TIME) == 1500.0
+        assert provider.get_price_of_contract_in_usd(WETH, AT_TIME + 3600) == 1500.0
+
+    assert len(caplog.records) == 1
+
+
+def test_failing_disk_cache_reads_and_writes_are_a_miss(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(price.CoingeckoPriceProvider, "_disk_cache", FailingDiskCache())
+    provider = price.CoingeckoPriceProvider()
+
+    with caplog.at_level(logging.WARNING):
+        assert provider.get_price_of_contract_in_usd(WETH, AT_TIME) == 1500.0
+
+    assert len(caplog.records) == 1
+    assert price.CoingeckoPriceProvider._disk_cache is None
+
+
+class FailingSession:
+    def execute(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        raise exceptions.MissingDataError("No uniswap swap found")
+
+
+def test_uniswap_batch_errors_keep_their_cause() -> None:
+    provider = price.UniswapV3PriceProvider()
+    provider._session = FailingSession()
+
+    try:
+        provider.get_usd_values_of_transactions([WETH])
+    except exceptions.CantExtractUsdValueError as e:
+        assert isinstance(e.__cause__, exceptions.MissingDataError)
+    else:
+        pytest.fail("CantExtractUsdValueError not raised")
+
+
+def _missing_swap() -> exceptions.CantExtractUsdValueError:
+    exception = exceptions.CantExtractUsdValueError("No uniswap swap found")
+    exception.__cause__ = exceptions.MissingDataError("No uniswap swap found")
+    return exception
+
+
+def _request_failure() -> exceptions.CantExtractUsdValueError:
+    exception = exceptions.CantExtractUsdValueError("req_code 502")
+    exception.__cause__ = exceptions.RequestError(status_code=502)
+    return exception
+
+
+class FakeUniswapProvider:
+    def __init__(
+        self,
+        values: dict[eth_typing.ChecksumAddress, float] | None = None,
+        exception: Exception | None = None,
+        delay_s: float = 0.0,
+    ) -> None:
+        self.values = values or {}
+        self.exception = exception
+        self.delay_s = delay_s
+        self.calls: list[list[eth_typing.ChecksumAddress]] = []
+
+    def get_usd_value_of_transaction(
+        self, transaction_hash: eth_typing.ChecksumAddress
+    ) -> float:
+        self.calls.append([transaction_hash])
+        time.sleep(self.delay_s)
+        if self.exception is not None:
+            raise self.exception
+        return self.values[transaction_hash]
+
+    def get_usd_values_of_transactions(
+        self, transaction_hashes: list[eth_typing.ChecksumAddress]
+    ) -> dict[eth_typing.ChecksumAddress, float]:
+        self.calls.append(transaction_hashes)
+        if self.exception is not None:
+            raise self.exception
+        return {
+            transaction_hash: self.values[transaction_hash]
+            for transaction_hash in transaction_hashes
+            if transaction_hash in self.values
+        }
+
+
+@pytest.fixture
+def uniswap(
+    monkeypatch: pytest.MonkeyPatch,
+) -> price.UniswapTransactionValueUsdProvider:
+    base = price.BaseUniswapTransactionValueUsdProvider
+    monkeypatch.setattr(base, "_value_cache", cachetools.TTLCache(16, ttl=600))
+    monkeypatch.setattr(base, "_missing_value_cache", cachetools.TTLCache(16, ttl=600))
+    return price.UniswapTransactionValueUsdProvider()
+
+
+def _set_uniswap_providers(
+    provider: price.UniswapTransactionValueUsdProvider,
+    v3_provider: FakeUniswapProvider,
+    v2_provider: FakeUniswapProvider,
+) -> None:
+    # cached_property reads the instance dict first
+    provider.__dict__["_v3_value_provider"] = v3_provider
+    provider.__dict__["_v2_value_provider"] = v2_provider
+
+
+def test_uniswap_prefers_v3_when_v2_answers_first(
+    uniswap: price.UniswapTransactionValueUsdProvider,
+) -> None:
+    v3_provider = FakeUniswapProvider({TRANSACTION_HASH: 1.0}, delay_s=0.2)
+    v2_provider = FakeUniswapProvider({TRANSACTION_HASH: 2.0})
+    _set_uniswap_providers(uniswap, v3_provider, v2_provider)
+
+    assert uniswap.get_usd_value_of_transaction(TRANSACTION_HASH) == 1.0
+    assert uniswap._value_cache[TRANSACTION_HASH] == 1.0
+
+
+def test_uniswap_falls_back_to_v2_when_v3_fails(
+    uniswap: price.UniswapTransactionValueUsdProvider,
+) -> None:
+    v3_provider = FakeUniswapProvider(exception=_missing_swap())
+    v2_provider = FakeUniswapProvider({TRANSACTION_HASH: 2.0})
+    _set_uniswap_providers(uniswap, v3_provider, v2_provider)
+
+    assert uniswap.get_usd_value_of_transaction(TRANSACTION_HASH) == 2.0
+
+
+def test_uniswap_caches_miss_when_both_subgraphs_have_no_swap(
+    uniswap: price.UniswapTransactionValueUsdProvider,
+) -> None:
+    v3_provider = FakeUniswapProvider(exception=_missing_swap())
+    v2_provider = FakeUniswapProvider(exception=_missing_swap())
+    _set_uniswap_providers(uniswap, v3_provider, v2_provider)
+
+    for _ in range(2):
+        with pytest.raises(exceptions.CantExtractUsdValueError):
+            uniswap.get_usd_value_of_transaction(TRANSACTION_HASH)
+
+    assert (len(v3_provider.calls), len(v2_provider.calls)) == (1, 1)
+
+
+def test_uniswap_does_not_cache_miss_on_request_failure(
+    uniswap: price.UniswapTransactionValueUsdProvider,
+) -> None:
+    v3_provider = FakeUniswapProvider(exception=_missing_swap())
+    v2_provider = FakeUniswapProvider(exception=_request_failure())
+    _set_uniswap_providers(uniswap, v3_provider, v2_provider)
+
+    for _ in range(2):
+        with pytest.raises(exceptions.CantExtractUsdValueError):
+            uniswap.get_usd_value_of_transaction(TRANSACTION_HASH)
+
+    assert (len(v3_provider.calls), len(v2_provider.calls)) == (2, 2)
+    assert TRANSACTION_HASH not in uniswap._missing_value_cache
+
+
+def test_uniswap_batch_does_not_cache_misses_when_v3_fails(
+    uniswap: price.UniswapTransactionValueUsdProvider,
+) -> None:
+    missing_hash = eth_typing.ChecksumAddress(
+        eth_typing.HexAddress(eth_typing.HexStr("0xb"))
+    )
+    v3_provider = FakeUniswapProvider(exception=_request_failure())
+    v2_provider = FakeUniswapProvider({TRANSACTION_HASH: 2.0})
+    _set_uniswap_providers(uniswap, v3_provider, v2_provider)
+
+    values = uniswap.get_usd_values_of_transactions([TRANSACTION_HASH, missing_hash])
+
+    assert values == {TRANSACTION_HASH: 2.0}
+    assert v2_provider.calls == [[TRANSACTION_HASH, missing_hash]]
+    assert missing_hash not in uniswap._missing_value_cache
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from crypto_utils import rate_limit
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+    async def async_sleep(self, delay: float) -> None:
+        # concurrent callers sleep side by side, the clock is not advanced
+        self.sleeps.append(delay)
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake_clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", fake_clock.monotonic)
+    monkeypatch.setattr(time, "sleep", fake_clock.sleep)
+    monkeypatch.setattr(asyncio, "sleep", fake_clock.async_sleep)
+    return fake_clock
+
+
+def test_burst_does_not_wait(clock: FakeClock) -> None:
+    limiter = rate_limit.RateLimiter(rate=120, period_s=60, burst=5)
+    for _ in range(5):
+        limiter.acquire()
+    assert clock.sleeps == []
+
+
+def test_waits_for_refill_once_burst_is_used(clock: FakeClock) -> None:
+    limiter = rate_limit.RateLimiter(rate=120, period_s=60, burst=5)
+    for _ in range(7):
+        limiter.acquire()
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_refills_at_rate(clock: FakeClock) -> None:
+    limiter = rate_limit.RateLimiter(rate=120, period_s=60, burst=5)
+    for _ in range(5):
+        limiter.acquire()
+    clock.now += 1.0
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.sleeps == []
+    limiter.acquire()
+    assert clock.sleeps == [0.5]
+
+
+def test_refill_is_capped_at_burst(clock: FakeClock) -> None:
+    limiter = rate_limit.RateLimiter(rate=120, period_s=60, burst=5)
+    clock.now += 3600
+    for _ in range(6):
+        limiter.acquire()
+    assert clock.sleeps == [0.5]
+
+
+def test_burst_defaults_to_rate(clock: FakeClock) -> None:
+    limiter = rate_limit.RateLimiter(rate=4, period_s=1)
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.sleeps == []
+    limiter.acquire()
+    assert clock.sleeps == [0.25]
+
+
+def test_concurrent_callers_wait_cumulatively(clock: FakeClock) -> None:
+    limiter = rate_limit.RateLimiter(rate=120, period_s=60, burst=5)
+
+    async def acquire_all() -> None:
+        await asyncio.gather(*(limiter.acquire_async() for _ in range(10)))
+
+    asyncio.run(acquire_all())
+
+    # the first 5 take the burst, every later caller waits one more refill
+    assert clock.sleeps == [0.5 * i for i in range(1, 6)]
@@ -0,0 +1,80 @@
+import eth_typing
+import pytest
+
+from crypto_utils import w3
+
+USDC = eth_typing.ChecksumAddress(
+    eth_typing.HexAddress(
+        eth_typing.HexStr("0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48")
+    )
+)
+MKR = eth_typing.ChecksumAddress(
+    eth_typing.HexAddress(
+        eth_typing.HexStr("0x9f8F72aA9304c8B593d555F12eF6589cC3A579A2")
+    )
+)
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+
+def _encode_string(value: str) -> bytes:
+    encoded = value.encode()
+    padding = b"\x00" * (-len(encoded) % 32)
+    return _word(32) + _word(len(encoded)) + encoded + padding
+
+
+def test_decode_uint() -> None:
+    assert w3._decode_uint(_word(18)) == 18
+
+
+def test_decode_uint_short_data() -> None:
+    assert w3._decode_uint(b"") is None
+    assert w3._decode_uint(_word(18)[:31]) is None
+
+
+def test_decode_string() -> None:
+    assert w3._decode_string(_encode_string("USDC")) == "USDC"
+
+
+def test_decode_string_bytes32_symbol() -> None:
+    # MKR returns a bytes32 instead of an abi encoded string
+    assert w3._decode_string(b"MKR".ljust(32, b"\x00")) is None
+
+
+def test_decode_string_short_data() -> None:
+    assert w3._decode_string(b"") is None
+    assert w3._decode_string(_word(32)) is None
+    assert w3._decode_string(_encode_string("USDC")[:66]) is None
+
+
+def test_decode_string_invalid_utf8() -> None:
+    assert w3._decode_string(_word(32) + _word(1) + b"\xff".ljust(32, b"\x00")) is None
+
+
+def test_decode_address() -> None:
+    address_word = bytes(12) + bytes.fromhex(USDC[2:])
+    assert w3._decode_address(address_word) == USDC
+
+
+def test_decode_address_short_data() -> None:
+    assert w3._decode_address(b"") is None
+
+
+def test_get_erc20_infos_skips_undecodable_tokens(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    aggregate3_results = [
+        (True, _encode_string("USDC")),
+        (True, _word(6)),
+        (True, b"MKR".ljust(32, b"\x00")),
+        (True, _word(18)),
+    ]
+    monkeypatch.setattr(w3, "_aggregate3", lambda calls: aggregate3_results)
+
+    erc20_infos = w3.get_erc20_infos([USDC, MKR])
+
+    assert list(erc20_infos) == [USDC]
+    assert erc20_infos[USDC].symbol == "USDC"
+    assert erc20_infos[USDC].decimals == 6